@@ -1,2 +1,2 @@
 # _version.py
-__version__ = "0.3.12"
+__version__ = "0.3.13"
@@ -23,7 +23,7 @@ from sqlalchemy.sql.elements import BinaryExpression
 from . import model
 from .column_types import WriteOnlyColumn
 from .serializers import STOP_VALUE
-from .utils import xlate
+from .utils import xlate, _is_psycopg2
 from .doc_utils import (
     process_expression,
     _property,
@@ -152,9 +152,14 @@ class DB(object):
                 to INFO. defaults to False. echo can also be "debug" for more
                 detail.
 
+        With psycopg2, executemany_mode defaults to "values", so that bulk
+        inserts are sent as multi-row INSERT statements.
+
         Returns:
             session (obj)
         """
+        if _is_psycopg2(self.config):
+            kwargs.setdefault("executemany_mode", "values")
         engine = self.create_engine(self.config, echo=echo, *args, **kwargs)
         engine.connect()
         session = orm.sessionmaker(bind=engine)()
@@ -192,7 +197,11 @@ class DB(object):
         """
         # see how this session is not the 'session' object
         self.orm.session.close_all_sessions()
-        engine = create_engine(self.config, echo=echo)
+        if self.session is not None and not echo:
+            # the session engine is reused rather than creating another
+            engine = self.session.bind
+        else:
+            engine = create_engine(self.config, echo=echo)
         self.Model().metadata.drop_all(engine, tables=tables, checkfirst=checkfirst)
 
     def create_all(self, bind=None, checkfirst=True):
@@ -365,10 +374,9 @@ class DB(object):
         if serial_fields is not None:
             columns = serial_fields
         else:
+            stop_list = cls._get_serial_stop_list()
             columns = [
-                key
-                for key in cls.__dict__.keys()
-                if key not in cls._get_serial_stop_list()
+                key for key in cls.__dict__.keys() if key not in stop_list
             ]
 
         for key in columns:
@@ -3,17 +3,56 @@
 This module implements a base model to be used for table creation.
 
 """
-import json
+import sys
 from inspect import signature
-from sqlalchemy import inspect
-from sqlalchemy.ext.declarative import as_declarative
+from sqlalchemy import Column, inspect
+from sqlalchemy.ext.declarative import as_declarative, DeclarativeMeta
+from sqlalchemy.orm import configure_mappers, selectinload
 from sqlalchemy.orm.attributes import InstrumentedAttribute
 
-from .utils import xlate
+from .utils import xlate, _json_loads, _json_dumps, _json_items, _batches
 from .serializers import _eval_value, STOP_VALUE, SERIAL_STOPLIST
 
+# class attribute holding information cached for each model class
+CACHE_ATTR = "_dbbase_cache"
 
-@as_declarative()
+# records inserted at a time from a file, unless batch_size is given
+FILE_BATCH_SIZE = 10000
+
+
+def _clear_cache(cls):
+    """_clear_cache
+
+    This function clears the cached information of a class and of its
+    subclasses, since subclasses inherit what has been changed.
+    """
+    cache = cls.__dict__.get(CACHE_ATTR)
+    if cache:
+        cache.clear()
+    for subclass in cls.__subclasses__():
+        _clear_cache(subclass)
+
+
+class ModelMeta(DeclarativeMeta):
+    """
+    This metaclass clears the cached class information whenever an
+    attribute is assigned to or deleted from a model class, such as a new
+    SERIAL_STOPLIST or a relationship added after the class has been
+    created.
+    """
+
+    def __setattr__(cls, key, value):
+        super().__setattr__(key, value)
+        if key != CACHE_ATTR:
+            _clear_cache(cls)
+
+    def __delattr__(cls, key):
+        super().__delattr__(key)
+        if key != CACHE_ATTR:
+            _clear_cache(cls)
+
+
+@as_declarative(metaclass=ModelMeta)
 class Model(object):
     """
     This class replicates some of the design features available
@@ -56,6 +95,11 @@ class Model(object):
     of fields that would be used as `SERIAL_FIELDS` when serializing
     this class.
 
+    Information that depends only on the class, such as the columns, is
+    cached on the class. Assigning a new value to a class variable clears
+    the cache, but changing a list in place, such as appending to
+    SERIAL_STOPLIST, is not detected. In that case, call clear_cache().
+
     """
 
     # catchall for sqlalchemy classes and functions
@@ -83,9 +127,84 @@ class Model(object):
         """
         return cls.__name__
 
+    @classmethod
+    def _get_cache(cls):
+        """_get_cache
+
+        Returns the dict of cached information for this class. The dict
+        belongs to the class itself rather than being inherited from a
+        parent class.
+        """
+        cache = cls.__dict__.get(CACHE_ATTR)
+        if cache is None:
+            cache = {}
+            # bypasses DeclarativeMeta, which would expire the memoized
+            # attributes of the mapper for a plain cache attribute
+            type.__setattr__(cls, CACHE_ATTR, cache)
+        return cache
+
+    @classmethod
+    def clear_cache(cls):
+        """clear_cache
+
+        This function clears the cached information of this class and its
+        subclasses. It is only needed after changing a class variable in
+        place, such as appending to SERIAL_STOPLIST, since assigning a
+        class variable clears the cache already.
+
+        Default:
+            clear_cache()
+        """
+        _clear_cache(cls)
+
+    @classmethod
+    def _get_columns(cls):
+        """_get_columns
+
+        Returns a tuple of the table columns.
+        """
+        cache = cls._get_cache()
+        if "columns" not in cache:
+            cache["columns"] = tuple(cls.__table__.columns)
+        return cache["columns"]
+
+    @classmethod
+    def _get_column_keys(cls):
+        """_get_column_keys
+
+        Returns a frozenset of the names of the columns defined in the
+        class.
+        """
+        cache = cls._get_cache()
+        if "column_keys" not in cache:
+            cache["column_keys"] = frozenset(
+                key
+                for key, value in cls.__dict__.items()
+                if isinstance(value, InstrumentedAttribute)
+                and isinstance(value.expression, Column)
+            )
+        return cache["column_keys"]
+
+    @classmethod
+    def _get_camel_keys(cls):
+        """_get_camel_keys
+
+        Returns a dict of field names and their camel case names. It is
+        filled in by `to_dict` as fields are serialized, so it holds only
+        attribute names of the class.
+        """
+        cache = cls._get_cache()
+        if "camel_keys" not in cache:
+            cache["camel_keys"] = {}
+        return cache["camel_keys"]
+
     @classmethod
     def _get_serial_stop_list(cls):
-        """Return default stop list, class stop list."""
+        """Return default stop list, class stop list as a frozenset."""
+        cache = cls._get_cache()
+        if "serial_stop_list" in cache:
+            return cache["serial_stop_list"]
+
         if cls.SERIAL_STOPLIST is None:
             serial_stoplist = []
         else:
@@ -95,7 +214,10 @@ class Model(object):
                 "SERIAL_STOPLIST must be a list of one or more fields that"
                 "would not be included in a serialization."
             )
-        return cls._DEFAULT_SERIAL_STOPLIST + SERIAL_STOPLIST + serial_stoplist
+        cache["serial_stop_list"] = frozenset(
+            cls._DEFAULT_SERIAL_STOPLIST + SERIAL_STOPLIST + serial_stoplist
+        )
+        return cache["serial_stop_list"]
 
     @classmethod
     def _get_relationship(cls, field):
@@ -110,10 +232,13 @@ class Model(object):
             if a relationship is found, returns the relationship
             otherwise None
         """
-        tmp = inspect(cls).relationships
+        cache = cls._get_cache()
+        if "relationships" not in cache:
+            cache["relationships"] = dict(inspect(cls).relationships.items())
 
-        if field in tmp.keys():
-            return tmp[field]
+        relationships = cache["relationships"]
+        if field in relationships:
+            return relationships[field]
 
         return None
 
@@ -126,7 +251,19 @@ class Model(object):
         Is it self-referential
         One to many
         join_depth
+
+        The result is cached for the class, so it is shared between
+        calls and should not be modified.
         """
+        cache = cls._get_cache()
+        cache_key = ("relations_info", field)
+        if cache_key not in cache:
+            cache[cache_key] = cls._make_relations_info(field)
+        return cache[cache_key]
+
+    @classmethod
+    def _make_relations_info(cls, field):
+        """Creates the relationship info for _relations_info."""
         relation = cls._get_relationship(field)
         if relation is None:
             return None
@@ -161,13 +298,21 @@ class Model(object):
         This function returns True if one or more relationships are self-
         referential.
         """
-        for field in cls.get_serial_fields():
-            rel_info = cls._relations_info(field)
-            if rel_info is not None:
-                if rel_info["self-referential"]:
-                    return True
-
-        return False
+        # backrefs are added to the classes while the mappers are
+        # configured, which clears the cache, so that is done first
+        configure_mappers()
+        cache = cls._get_cache()
+        if "has_self_ref" not in cache:
+            has_self_ref = False
+            for field in cls.get_serial_fields():
+                rel_info = cls._relations_info(field)
+                if rel_info is not None:
+                    if rel_info["self-referential"]:
+                        has_self_ref = True
+                        break
+            cache["has_self_ref"] = has_self_ref
+
+        return cache["has_self_ref"]
 
     @classmethod
     def get_serial_fields(cls):
@@ -182,6 +327,8 @@ class Model(object):
         Default:
             get_serial_fields()
 
+        Unless SERIAL_FIELDS is set, the fields are in alphabetical order.
+
         Returns:
             serial_fields (list) : current list of fields
         """
@@ -194,9 +341,50 @@ class Model(object):
                 )
             return cls.SERIAL_FIELDS
 
-        fields = [field for field in dir(cls) if not field.startswith("_")]
+        cache = cls._get_cache()
+        if "serial_fields" not in cache:
+            fields = [field for field in dir(cls) if not field.startswith("_")]
+            # kept in sorted order, so that sorting in to_dict is a single pass
+            cache["serial_fields"] = tuple(
+                sorted(set(fields) - cls._get_serial_stop_list())
+            )
+
+        return list(cache["serial_fields"])
+
+    @classmethod
+    def serial_load_options(cls):
+        """serial_load_options
+
+        This function returns query options that load the relationships
+        used in serialization with a SELECT ... IN for the whole query,
+        rather than with a SELECT for each record as `to_dict` reaches
+        them. Only relationships with the default lazy="select" loading,
+        or its alias lazy=True, among the serial fields are included.
+
+        Default:
+            serial_load_options()
+
+        Usage:
+            users = User.query.options(*User.serial_load_options()).all()
+
+        Returns:
+            options (list) : selectinload options for the query
+        """
+        # see _has_self_ref
+        configure_mappers()
+        cache = cls._get_cache()
+        if "serial_load_options" not in cache:
+            options = []
+            for field in cls.get_serial_fields():
+                rel_info = cls._relations_info(field)
+                if rel_info is not None and rel_info["lazy"] in (
+                    "select",
+                    True,
+                ):
+                    options.append(selectinload(getattr(cls, field)))
+            cache["serial_load_options"] = tuple(options)
 
-        return list(set(fields) - set(cls._get_serial_stop_list()))
+        return list(cache["serial_load_options"])
 
     def to_dict(
         self,
@@ -245,7 +433,9 @@ class Model(object):
             if self.SERIAL_FIELD_RELATIONS is not None:
                 serial_field_relations = self.SERIAL_FIELD_RELATIONS
 
-        if self._class() in level_limits:
+        class_name = self._class()
+
+        if class_name in level_limits:
             # it has already been done
             if not self._has_self_ref():
                 return STOP_VALUE
@@ -258,18 +448,21 @@ class Model(object):
         if sort:
             serial_fields = sorted(serial_fields)
 
+        if to_camel_case:
+            camel_keys = self._get_camel_keys()
+
         for key in serial_fields:
             # special treatment for relationships
             rel_info = self._relations_info(key)
             if rel_info is not None:
                 if (
                     not rel_info["self-referential"]
-                    and self._class() in level_limits
+                    and class_name in level_limits
                 ):
                     # stop it right there
                     res = STOP_VALUE
 
-            value = self.__getattribute__(key)
+            value = getattr(self, key)
 
             if rel_info and rel_info["lazy"] == "dynamic":
                 value = [item for item in value.all()]
@@ -291,18 +484,23 @@ class Model(object):
                     value,
                     to_camel_case,
                     level_limits,
-                    source_class=self._class(),
+                    source_class=class_name,
                     serial_field_relations=serial_field_relations,
                 )
 
                 if to_camel_case:
-                    key = xlate(key, camel_case=True)
+                    camel_key = camel_keys.get(key)
+                    if camel_key is None:
+                        camel_key = camel_keys[key] = xlate(
+                            key, camel_case=True
+                        )
+                    key = camel_key
 
                 if res != STOP_VALUE:
                     result[key] = res
 
-        if self._class() not in level_limits:
-            level_limits[self._class()] = 1
+        if class_name not in level_limits:
+            level_limits[class_name] = 1
 
         return result
 
@@ -341,10 +539,14 @@ class Model(object):
                 and a list of fields to be typically included with the related
                 object.
 
+        If `dbbase.utils.ORJSON_SERIALIZE` is set to True and orjson is
+        installed, it is used for indents of None and 2. The output is then
+        compact, and NaN and Infinity are written as null.
+
         return
             JSON formatted string of the data.
         """
-        return json.dumps(
+        return _json_dumps(
             self.to_dict(
                 to_camel_case=to_camel_case,
                 level_limits=level_limits,
@@ -355,6 +557,67 @@ class Model(object):
             indent=indent,
         )
 
+    @classmethod
+    def serialize_query(
+        cls,
+        query=None,
+        to_camel_case=True,
+        sort=False,
+        indent=None,
+        serial_fields=None,
+        serial_field_relations=None,
+    ):
+        """serialize_query
+
+        Output JSON formatted list of the records of a query. The
+        relationships that are serialized are loaded with the query, using
+        `serial_load_options`, rather than a query for each record. That is
+        skipped if serial_fields is given.
+
+        Default:
+            serialize_query(
+                query=None, to_camel_case=True, sort=False, indent=None,
+                serial_fields=None, serial_field_relations=None
+            )
+
+        Args:
+            query: (None : obj) : a query of this class, such as
+                `User.query.filter_by(name="Bob")`. If None, all records
+                are serialized.
+            to_camel_case (boolean) True converts to camel case.
+            sort: (bool) : This flag determines whether the keys will be
+                sorted.
+            indent: (integer : None) The number of spaces to indent to improve
+                readability.
+            serial_fields (None | list) : a list of fields to be substituted
+                for `cls.SERIAL_FIELDS`
+            serial_field_relations (None | dict) : To enable a more nuanced
+                control of relations objects, the name of a downstream class
+                and a list of fields to be typically included with the related
+                object.
+
+        return
+            JSON formatted string of the list of records.
+        """
+        if query is None:
+            query = cls.query
+
+        if serial_fields is None:
+            query = query.options(*cls.serial_load_options())
+
+        return _json_dumps(
+            [
+                record.to_dict(
+                    to_camel_case=to_camel_case,
+                    sort=sort,
+                    serial_fields=serial_fields,
+                    serial_field_relations=serial_field_relations,
+                )
+                for record in query
+            ],
+            indent=indent,
+        )
+
     @classmethod
     def deserialize(cls, data, from_camel_case=True, only_columns=False):
         """deserialize
@@ -373,36 +636,37 @@ class Model(object):
                 back to a dict. `data` can also be a dict or list that simply
                 needs to have the keys converted to snake_case.
             from_camel_case: (bool) : True will cause the keys to be converted
-                back to snake_case.
+                back to snake_case. If False, the data is returned as is,
+                without copying, and only_columns does not apply.
             only_columns: (bool) : True will cause the keys that are not columns
                 to be stripped out.
         Returns:
             data (obj) : the converted data
         """
 
-        def only_column_check(key):
-            if key in cls.__dict__:
-                if hasattr(cls.__dict__[key], "expression"):
-                    return isinstance(
-                        cls.__dict__[key].expression, cls.db.Column
-                    )
-            return False
-
         if isinstance(data, str) or isinstance(data, bytes):
             # assume json
-            data = json.loads(data)
+            data = _json_loads(data)
 
         if not from_camel_case:
             return data
 
+        # the map is copied since keys not known in advance are added
+        key_map = cls._get_deserial_key_map(only_columns).copy()
+
+        def convert_key(key):
+            """Returns the converted key or None if it is to be dropped."""
+            try:
+                return key_map[key]
+            except KeyError:
+                new_key = key_map[key] = cls._deserial_key(key, only_columns)
+                return new_key
+
         if isinstance(data, dict):
             result = {}
             for key, value in data.items():
-                key = xlate(key, camel_case=False)
-                if only_columns:
-                    if only_column_check(key):
-                        result[key] = value
-                else:
+                key = convert_key(key)
+                if key is not None:
                     result[key] = value
 
         else:
@@ -411,17 +675,124 @@ class Model(object):
             for line in data:
                 res = {}
                 for key, value in line.items():
-                    key = xlate(key, camel_case=False)
-                    if only_columns:
-                        if only_column_check(key):
-                            res[key] = value
-                    else:
+                    key = convert_key(key)
+                    if key is not None:
                         res[key] = value
                 result.append(res)
 
         return result
 
-    def save(self):
+    @classmethod
+    def bulk_deserialize(cls, data, from_camel_case=True, batch_size=None):
+        """bulk_deserialize
+
+        This function converts serialized records with `deserialize` and
+        inserts them with a bulk insert, which is much faster than saving
+        each object. Keys that are not columns are dropped.
+
+        The records are inserted as given. Unlike saving objects, no
+        objects are created, and relationships and Python-side defaults
+        that depend on objects are not processed.
+
+        For large files, data can be an open file of a JSON array. If
+        ijson is installed, the records are read from it as they are
+        inserted, and the file should be opened in binary mode ("rb"),
+        which ijson reads directly. Only batch_size records are converted
+        and held at a time; for a file it defaults to FILE_BATCH_SIZE.
+
+        Default:
+            bulk_deserialize(data, from_camel_case=True, batch_size=None)
+
+        Args:
+            data: (bytes : str : dict : list : file) : JSON string of
+                records, a record or list of records as dicts, or a file
+                with a JSON array of records.
+            from_camel_case: (bool) : True will cause the keys to be
+                converted back to snake_case.
+            batch_size: (None : int) : the number of records inserted at
+                a time. If None, all of the records are inserted at once,
+                except for a file, which is inserted FILE_BATCH_SIZE
+                records at a time.
+
+        Returns:
+            None
+        """
+        if hasattr(data, "read"):
+            data = _json_items(data)
+            if batch_size is None:
+                batch_size = FILE_BATCH_SIZE
+        elif isinstance(data, str) or isinstance(data, bytes):
+            data = _json_loads(data)
+
+        if isinstance(data, dict):
+            data = [data]
+
+        session = cls.db.session
+        for batch in _batches(data, batch_size):
+            session.bulk_insert_mappings(
+                cls,
+                cls.deserialize(
+                    batch, from_camel_case=from_camel_case, only_columns=True
+                ),
+            )
+        session.commit()
+
+    @classmethod
+    def _get_deserial_key_map(cls, only_columns):
+        """_get_deserial_key_map
+
+        Returns a dict for converting the keys of serialized data back to
+        field names. It is filled in advance with the camel case names of
+        the columns, the keys usually found. Each value is the converted
+        key, or None if the key is dropped because only columns are wanted.
+        """
+        cache = cls._get_cache()
+        cache_key = ("deserial_key_map", only_columns)
+        if cache_key not in cache:
+            key_map = {}
+            for column_key in cls._get_column_keys():
+                key = xlate(column_key, camel_case=True)
+                new_key = cls._deserial_key(key, only_columns)
+                if new_key is not None:
+                    # the same str object as the attribute name
+                    new_key = sys.intern(new_key)
+                key_map[sys.intern(key)] = new_key
+            cache[cache_key] = key_map
+        return cache[cache_key]
+
+    @classmethod
+    def _deserial_key(cls, key, only_columns):
+        """_deserial_key
+
+        Returns the key converted from camel case, or None if only columns
+        are wanted and the key is not a column.
+        """
+        key = xlate(key, camel_case=False)
+        if only_columns and key not in cls._get_column_keys():
+            return None
+        return key
+
+    @classmethod
+    def get(cls, ident):
+        """get
+
+        This function returns the object with the primary key `ident`, or
+        None if there is none. An object already in the session is
+        returned without a query.
+
+        Default:
+            get(ident)
+
+        Args:
+            ident: (obj : tuple) : the primary key value, or a tuple of
+                values for a composite primary key.
+
+        Return
+            obj (obj : None) : the object found
+        """
+        return cls.db.session.query(cls).get(ident)
+
+    def save(self, commit=True):
         """save
 
         This function saves adds and commits the object via session.
@@ -430,15 +801,25 @@ class Model(object):
         provide validation checks prior to saving.
 
         Default:
-            save()
+            save(commit=True)
+
+        Args:
+            commit: (bool) : If False, the object is added and flushed,
+                which updates the identity, but the commit is left for
+                later. This enables several objects to be saved with one
+                commit.
 
         Return
             saved_obj (obj) : the object that has been saved with
                 hopefully an updated identity.
 
         """
-        self.db.session.add(self)
-        self.db.session.commit()
+        session = self.db.session
+        session.add(self)
+        if commit:
+            session.commit()
+        else:
+            session.flush()
         return self
 
     def delete(self):
@@ -456,8 +837,9 @@ class Model(object):
         Return
             None
         """
-        self.db.session.delete(self)
-        self.db.session.commit()
+        session = self.db.session
+        session.delete(self)
+        session.commit()
 
     def _null_columns(self):
         """_null_columns
@@ -466,7 +848,7 @@ class Model(object):
         """
         return [
             column.name
-            for column in self.__table__.columns
+            for column in self._get_columns()
             if getattr(self, column.name) is None
         ]
 
@@ -647,11 +1029,13 @@ class Model(object):
         This function returns True if the column has 'writeOnly' True
         in the info field.
         """
-        if column_name in cls.__dict__:
-            tmp = cls.__dict__[column_name]
-            if isinstance(tmp, InstrumentedAttribute):
-                if isinstance(tmp.expression, cls.db.Column):
-                    if "writeOnly" in tmp.expression.info:
-                        value = tmp.expression.info["writeOnly"]
-                        return value
-        return False
+        cache = cls._get_cache()
+        if "write_only" not in cache:
+            write_only = {}
+            for key in cls._get_column_keys():
+                info = cls.__dict__[key].expression.info
+                if "writeOnly" in info:
+                    write_only[key] = info["writeOnly"]
+            cache["write_only"] = write_only
+
+        return cache["write_only"].get(column_name, False)
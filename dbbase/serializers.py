@@ -20,15 +20,20 @@ SERIAL_STOPLIST = [
     "_sa_instance_state",
     "__repr__",
     "__table__",
+    "bulk_deserialize",
+    "clear_cache",
     "db",
     "delete",
     "deserialize",
     "filter_columns",
+    "get",
     "get_serial_fields",
     "metadata",
     "query",
     "save",
+    "serial_load_options",
     "serialize",
+    "serialize_query",
     "to_dict",
     "validate_record",
     "SERIAL_STOPLIST",
@@ -37,6 +42,33 @@ SERIAL_STOPLIST = [
 ]
 
 
+def _datetime_value(value):
+    """Converts a datetime to TIME_FMT."""
+    return value.strftime(TIME_FMT)
+
+
+def _date_value(value):
+    """Converts a date to DATE_FMT."""
+    return value.strftime(DATE_FMT)
+
+
+def _uuid_value(value):
+    """Converts a UUID to hex digits without hyphens."""
+    return value.hex
+
+
+# types returned as they are
+_PASSTHROUGH_TYPES = frozenset([str, int, float, bool, type(None)])
+
+# conversions looked up by type, datetime before its parent class date
+_CONVERSIONS = {
+    datetime: _datetime_value,
+    date: _date_value,
+    Decimal: str,
+    uuid.UUID: _uuid_value,
+}
+
+
 def _eval_value(
     value, to_camel_case, level_limits, source_class, serial_field_relations
 ):
@@ -61,15 +93,20 @@ def _eval_value(
     returns
         values that have been converted as needed
     """
-    if isinstance(value, datetime):
-        result = value.strftime(TIME_FMT)
-    elif isinstance(value, date):
-        result = value.strftime(DATE_FMT)
-    elif isinstance(value, Decimal):
-        result = str(value)
-    elif isinstance(value, uuid.UUID):
-        result = str(value).replace("-", "")
-    elif isinstance(value, list):
+    value_type = type(value)
+    if value_type in _PASSTHROUGH_TYPES:
+        return value
+
+    convert = _CONVERSIONS.get(value_type)
+    if convert is not None:
+        return convert(value)
+
+    # subclasses of the converted types
+    for convert_type, convert in _CONVERSIONS.items():
+        if isinstance(value, convert_type):
+            return convert(value)
+
+    if isinstance(value, list):
         if value:
             result, level_limits = _eval_value_list(
                 value,
@@ -153,8 +190,9 @@ def _eval_value_list(
 
     tmp_limits = None
     for item in value:
-        tmp_limits = level_limits.copy()
         if hasattr(item, "to_dict"):
+            # models update the limits, so each line starts from a copy
+            tmp_limits = level_limits.copy()
             status = True
             result = STOP_VALUE
             if item._class() in level_limits:
@@ -169,6 +207,8 @@ def _eval_value_list(
                     serial_field_relations,
                 )
         else:
+            # other values only read the limits
+            tmp_limits = level_limits
             result = _eval_value(
                 item,
                 to_camel_case,
@@ -179,9 +219,10 @@ def _eval_value_list(
 
         tmp_list.append(result)
 
-    if all(list(map(lambda i: i == STOP_VALUE, tmp_list))):
+    if all(item == STOP_VALUE for item in tmp_list):
         tmp_list = STOP_VALUE
     if tmp_limits is not None:
-        level_limits = tmp_limits.copy()
+        # the limits of the last line
+        level_limits = tmp_limits
 
     return tmp_list, level_limits
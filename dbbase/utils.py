@@ -2,12 +2,39 @@
 """
 This module implements some utilities.
 """
-import string
+import re
 import json
 import logging
+import sys
+from itertools import chain, islice
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 logger = logging.getLogger(__file__)
 
+# if True and orjson is installed, serialize uses orjson for its output
+ORJSON_SERIALIZE = False
+
+# memoized key conversions for xlate
+XLATE_CACHE_SIZE = 4096
+_CAMEL_CACHE = {}
+_SNAKE_CACHE = {}
+
+# upper case characters that start a word in camel case
+_UPPER_RE = re.compile("([A-Z])")
+
+# runs of digits that may be an integer too large for orjson
+_LONG_DIGITS_RE = re.compile(r"\d{19,}")
+_LONG_DIGITS_BYTES_RE = re.compile(rb"\d{19,}")
+
 
 def db_config(base, config_vars=None):
     """
@@ -51,20 +78,160 @@ def db_config(base, config_vars=None):
     return base
 
 
+def _json_loads(data):
+    """_json_loads
+
+    This function converts a JSON str or bytes to Python objects. If orjson
+    is installed it is used for the speed. orjson converts integers too
+    large for 64 bits to float, so JSON with a run of 19 or more digits is
+    passed to the standard json module instead, as is anything that orjson
+    rejects, such as NaN. Results and errors are the same either way.
+
+    Default:
+        _json_loads(data)
+
+    Args:
+        data: (str : bytes) : JSON to be converted
+
+    Returns:
+        data (obj) : the converted data
+    """
+    if orjson is not None:
+        if isinstance(data, str):
+            long_digits = _LONG_DIGITS_RE.search(data)
+        else:
+            long_digits = _LONG_DIGITS_BYTES_RE.search(data)
+        if long_digits is not None:
+            return json.loads(data)
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def _json_dumps(data, indent=None):
+    """_json_dumps
+
+    This function converts Python objects to a JSON str with the standard
+    json module.
+
+    Setting ORJSON_SERIALIZE to True uses orjson instead, if it is
+    installed and indent is None or 2, the only indents that orjson
+    supports. Its output differs: it is compact, without spaces after
+    separators, non-ASCII characters are not escaped, and NaN and
+    Infinity are written as null rather than NaN and Infinity. Anything
+    that orjson rejects, such as integers too large for 64 bits, is passed
+    to the standard json module.
+
+    Default:
+        _json_dumps(data, indent=None)
+
+    Args:
+        data: (obj) : data to be converted
+        indent: (integer : None) The number of spaces to indent.
+
+    Returns:
+        data (str) : the JSON formatted string
+    """
+    if ORJSON_SERIALIZE and orjson is not None and indent in (None, 2):
+        option = orjson.OPT_INDENT_2 if indent == 2 else 0
+        try:
+            return orjson.dumps(data, option=option).decode()
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(data, indent=indent)
+
+
+def _json_items(fobj):
+    """_json_items
+
+    This function returns the items of a JSON array in a file. If ijson
+    is installed, the items are read from the file as they are used, and
+    the file should be opened in binary mode, since ijson parses bytes.
+    Otherwise the whole file is read and converted.
+
+    Either way, a file that does not hold a JSON array raises a
+    ValueError.
+
+    Default:
+        _json_items(fobj)
+
+    Args:
+        fobj: (file) : file opened for reading, preferably in binary mode
+
+    Returns:
+        items (iterable) : the converted items
+    """
+    if ijson is not None:
+        events = ijson.parse(fobj, use_float=True)
+        first = next(events, None)
+        if first is None or first[1] != "start_array":
+            raise ValueError("The file must hold a JSON array")
+        return ijson.items(chain([first], events), "item")
+
+    items = _json_loads(fobj.read())
+    if not isinstance(items, list):
+        raise ValueError("The file must hold a JSON array")
+    return items
+
+
+def _batches(items, batch_size=None):
+    """_batches
+
+    This function yields lists of up to batch_size items. If batch_size is
+    None, all of the items are yielded as one list.
+
+    Default:
+        _batches(items, batch_size=None)
+
+    Args:
+        items: (iterable) : the items to be split into batches
+        batch_size: (None : int) : the maximum number of items in a batch
+
+    Returns:
+        batches (generator) : lists of items
+    """
+    if batch_size is None:
+        if not isinstance(items, list):
+            items = list(items)
+        if items:
+            yield items
+        return
+
+    if batch_size < 1:
+        raise ValueError(
+            "batch_size must be at least 1: {}".format(batch_size)
+        )
+
+    items = iter(items)
+    batch = list(islice(items, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(items, batch_size))
+
+
 def _is_sqlite(config):
     """_is_sqlite
 
     Default:
         _is_sqlite(config)
-    returns True if config contains the string sqlite
-    returns True if config contains :memory:
+    returns True if config starts with the string sqlite
+    returns True if config starts with :memory:
     """
-    if config.find("sqlite") > -1:
-        return True
+    return config.startswith(("sqlite", ":memory:"))
+
 
-    if config.find(":memory:") > -1:
-        return True
-    return False
+def _is_psycopg2(config):
+    """_is_psycopg2
+
+    Default:
+        _is_psycopg2(config)
+    returns True if config is for PostgreSQL with psycopg2, the default
+    PostgreSQL driver
+    """
+    dialect = config.split("://", 1)[0]
+    return dialect in ("postgresql", "postgres", "postgresql+psycopg2")
 
 
 def xlate(key, camel_case=True):
@@ -90,29 +257,47 @@ def xlate(key, camel_case=True):
     Returns:
         key (str) : the converted string
 
+    The conversions are memoized and interned, up to XLATE_CACHE_SIZE keys
+    for each direction.
     """
     if camel_case:
-        return _xlate_camel_case(key)
-
-    return _xlate_from_camel_case(key)
+        cache, func = _CAMEL_CACHE, _xlate_camel_case
+    else:
+        cache, func = _SNAKE_CACHE, _xlate_from_camel_case
+
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+
+    new_key = func(key)
+    # keys can come from incoming data, so the caches are limited
+    if len(cache) < XLATE_CACHE_SIZE:
+        # interned, the cached keys are shared by all of the dicts using them
+        new_key = sys.intern(new_key)
+        cache[key] = new_key
+    return new_key
 
 
 def _xlate_camel_case(key):
     """Convert example: start_date -> startDate """
     if key.find("_") > -1:
-        key = string.capwords(key.replace("_", " ")).replace(" ", "")
+        # same result as string.capwords, without the rejoining
+        key = "".join(
+            word.capitalize() for word in key.replace("_", " ").split()
+        )
         key = key[0].lower() + key[1:]
     return key
 
 
+def _snake_char(match):
+    """Returns the replacement for an upper case character."""
+    return "_" + match.group(1).lower()
+
+
 def _xlate_from_camel_case(key):
     """Convert example: startDate -> start_date """
-    new_key = ""
-    for char in key:
-        if char in string.ascii_uppercase:
-            new_key += "_" + char.lower()
-        else:
-            new_key += char
+    new_key = _UPPER_RE.sub(_snake_char, key)
     if new_key.startswith("_"):
         new_key = new_key[1:]
     return new_key
@@ -130,15 +315,24 @@ def get_model_defaults(cls):
 
     Returns:
         defaults: (dict) : A dictionary of the default values.
+
+    The columns with defaults are cached with the class, but functions are
+    executed on every call.
     """
+    cache = cls._get_cache()
+    if "model_defaults" not in cache:
+        defaults = []
+        for key in cls.__dict__.keys():
+            col = cls.__dict__[key]
+            if hasattr(col, "expression"):
+                if col.expression.default is not None:
+                    defaults.append((key, col.expression.default.arg))
+        cache["model_defaults"] = defaults
+
     tmp = {}
-    for key in cls.__dict__.keys():
-        col = cls.__dict__[key]
-        if hasattr(col, "expression"):
-            if col.expression.default is not None:
-                arg = col.expression.default.arg
-                if callable(arg):
-                    tmp[key] = arg(cls.db)
-                else:
-                    tmp[key] = arg
+    for key, arg in cache["model_defaults"]:
+        if callable(arg):
+            tmp[key] = arg(cls.db)
+        else:
+            tmp[key] = arg
     return tmp
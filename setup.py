@@ -17,9 +17,13 @@ LICENSE = "MIT"
 AUTHOR = "Donald Smiley"
 AUTHOR_EMAIL = "dsmiley@sidorof.com"
 PYTHON_REQUIRES = ">=3.6"
-INSTALL_REQUIRES = ["sqlalchemy<1.4"]
+INSTALL_REQUIRES = ["sqlalchemy>=1.3.7,<1.4"]
 EXTRAS_REQUIRE = {
-    "dev": "unittest"
+    "dev": "unittest",
+    # optional, faster JSON conversion
+    "fast": ["orjson"],
+    # optional, reads large JSON files for bulk_deserialize as needed
+    "stream": ["ijson>=3.1"],
 }
 CLASSIFIERS = [
     "Development Status :: 3 - Alpha",
@@ -26,15 +26,34 @@ Example 2: postgresql
 To test then for sqlite, one URI can be used
 
 """
+from contextlib import contextmanager
 import unittest
 import json
+import os
+import sqlite3
 import warnings
 
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
 import dbbase
 
 warnings.filterwarnings("ignore")
 
+
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragma(dbapi_connection, connection_record):
+    """Test databases do not need to survive a crash, so skip the syncs."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.close()
+
+
 CONFIG_FILE = "config.json"
+# used when CONFIG_FILE has not been written by tests/main.py
+SAMPLE_CONFIGS = "sample_configs.json"
 TESTDB_URI = "testdb_uri"
 TESTDB_VARS = "testdb_vars"
 BASEDB = "basedb"
@@ -43,9 +62,46 @@ USER = "user"  # superuser at this point
 
 
 def get_config_vars():
-    """json file with parameters"""
-    with open(CONFIG_FILE) as fobj:
-        return json.loads(fobj.read())
+    """json file with parameters
+
+    Without the file, such as when running pytest directly, the first of
+    the sample configs is used.
+
+    Under pytest-xdist each worker gets its own database, named after the
+    worker, so that workers do not drop each other's tables.
+    """
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE) as fobj:
+            config_vars = json.loads(fobj.read())
+    else:
+        with open(SAMPLE_CONFIGS) as fobj:
+            config_vars = json.loads(fobj.read())[0]
+
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if worker and DBNAME in config_vars[TESTDB_VARS]:
+        config_vars[TESTDB_VARS][DBNAME] += f"_{worker}"
+
+    return config_vars
+
+
+@contextmanager
+def count_statements(engine, prefix=None):
+    """Collects the SQL statements run on engine within the block.
+
+    If prefix is given, such as "INSERT", only statements starting with it
+    are collected.
+    """
+    statements = []
+
+    def _before_cursor_execute(conn, cursor, statement, *args):
+        if prefix is None or statement.startswith(prefix):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)
 
 
 class BaseTestCase(unittest.TestCase):
@@ -66,44 +122,42 @@ class DBBaseTestCase(BaseTestCase):
     def setUpClass(cls):
         """
         This doesn't check defaults.'
+
+        The configuration is resolved once here for all of the tests in the
+        class.
         """
         config_vars = get_config_vars()
-        config = dbbase.utils.db_config(
+        cls.db_uri = dbbase.utils.db_config(
             config_vars[TESTDB_URI], config_vars[TESTDB_VARS]
         )
 
         # for basedb, such as postgres to drop test db
         # uses a cheap trick
         if BASEDB in config_vars[TESTDB_VARS]:
-            config_base = dbbase.utils.db_config(
+            cls.db_uri_base = dbbase.utils.db_config(
                 config_vars[TESTDB_URI].replace("{dbname}", "{basedb}"),
                 config_vars[TESTDB_VARS],
             )
         else:
-            config_base = config
-        dbname = config_vars[TESTDB_VARS].get(DBNAME)
-        dbbase.maint.drop_database(config_base, dbname)
+            cls.db_uri_base = cls.db_uri
+        cls.dbname = config_vars[TESTDB_VARS].get(DBNAME)
+        dbbase.maint.drop_database(cls.db_uri_base, cls.dbname)
         dbbase.maint.create_database(
-            dbname=dbname,
-            config=config_base,
+            dbname=cls.dbname,
+            config=cls.db_uri_base,
             superuser=config_vars[TESTDB_VARS].get(USER),
         )
 
     def setUp(self):
         """Standard configuration."""
-        config_vars = get_config_vars()
-        self.db = self.dbbase.DB(
-            dbbase.utils.db_config(
-                config_vars[TESTDB_URI], config_vars[TESTDB_VARS]
-            )
-        )
+        self.db = self.dbbase.DB(self.db_uri)
         self.config = self.db.config
-        self.db.create_session()
-        self.db.drop_all(echo=False)
-        self.db.Model.metadata.clear()
+        # each DB loads a fresh Model, so its metadata starts empty and
+        # there is nothing to drop here; tearDown drops what a test created
 
     def tearDown(self):
-        self.db.session.commit()
+        # whatever a test left pending is discarded, not written
+        self.db.session.rollback()
         self.db.orm.session.close_all_sessions()
         self.db.drop_all(echo=False)
         self.db.Model.metadata.clear()
@@ -112,19 +166,4 @@ class DBBaseTestCase(BaseTestCase):
 
     @classmethod
     def tearDownClass(cls):
-        config_vars = get_config_vars()
-        config = dbbase.utils.db_config(
-            config_vars[TESTDB_URI], config_vars[TESTDB_VARS]
-        )
-
-        if BASEDB in config_vars[TESTDB_VARS]:
-            config_base = dbbase.utils.db_config(
-                config_vars[TESTDB_URI].replace("{dbname}", "{basedb}"),
-                config_vars[TESTDB_VARS],
-            )
-        else:
-            config_base = config
-
-        dbname = config_vars[TESTDB_VARS].get(DBNAME)
-        dbbase.maint.drop_database(config_base, dbname)
-        dbname = None
+        dbbase.maint.drop_database(cls.db_uri_base, cls.dbname)
@@ -1,2 +1,6 @@
 # tests/test_dbbase/__init__.py
-from ..fixtures.fixture_base import BaseTestCase, DBBaseTestCase
+from ..fixtures.fixture_base import (
+    BaseTestCase,
+    DBBaseTestCase,
+    count_statements,
+)
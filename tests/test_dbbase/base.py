@@ -1,4 +1,6 @@
 # test/test_dbbase/base.py
+from unittest import mock
+
 from . import DBBaseTestCase
 
 
@@ -308,6 +310,20 @@ class TestDBBaseClass(DBBaseTestCase):
             "table1Id", list(doc["definitions"]["Table2"]["properties"].keys())
         )
 
+        # a change to a related class shows up in the document
+        doc = db.doc_table(Table1)
+        fields = doc["Table1"]["properties"]["table2"]["relationship"][
+            "fields"
+        ]
+        self.assertListEqual(list(fields.keys()), ["id", "table1_id"])
+        Table2.SERIAL_STOPLIST = ["table1_id"]
+        doc = db.doc_table(Table1)
+        fields = doc["Table1"]["properties"]["table2"]["relationship"][
+            "fields"
+        ]
+        self.assertListEqual(list(fields.keys()), ["id"])
+        Table2.SERIAL_STOPLIST = None
+
         # test doc_column - no need to create new tables for this.
         self.assertDictEqual(
             db.doc_column(Table2, "table1_id"),
@@ -377,12 +393,33 @@ class TestDBBaseClass(DBBaseTestCase):
         # test return
 
     def test_create_session(self):
-        pass
-        # test defaults
+        """Test the engine arguments of create_session."""
+        db = self.db
+        engine = db.create_engine("sqlite://")
+        create_engine = mock.Mock(return_value=engine)
+        config = db.config
+
+        with mock.patch.object(db, "create_engine", create_engine):
+            # with psycopg2, bulk inserts use multi-row INSERT statements
+            db.config = "postgresql://user@localhost/testdb"
+            db.create_session()
+            create_engine.assert_called_with(
+                db.config, echo=False, executemany_mode="values"
+            )
 
-        # test self.attributes
+            # unless another value is asked for
+            db.create_session(executemany_mode="batch")
+            create_engine.assert_called_with(
+                db.config, echo=False, executemany_mode="batch"
+            )
 
-        # test return
+            # other databases do not know the argument
+            db.config = "sqlite://"
+            db.create_session()
+            create_engine.assert_called_with(db.config, echo=False)
+
+        db.config = config
+        engine.dispose()
 
     def test_drop_all(self):
 
@@ -3,11 +3,50 @@
 This module tests model functions.
 """
 from datetime import date, datetime
+import io
 import json
-from collections import OrderedDict
+import sys
+from unittest import mock
+
 from sqlalchemy.orm.relationships import RelationshipProperty
 
-from . import DBBaseTestCase
+from . import DBBaseTestCase, count_statements
+
+
+def create_users_with_addresses(db, **relationship_kwargs):
+    """Creates three users with two addresses each.
+
+    The keyword arguments are passed to the addresses relationship. The
+    session is emptied afterwards, so the records load from the database.
+    """
+
+    class User(db.Model):
+        __tablename__ = "users"
+        id = db.Column(db.Integer, primary_key=True)
+        name = db.Column(db.String(30), nullable=False)
+        addresses = db.relationship(
+            "Address", backref="user", **relationship_kwargs
+        )
+
+    class Address(db.Model):
+        __tablename__ = "addresses"
+        id = db.Column(db.Integer, primary_key=True)
+        email_address = db.Column(db.String, nullable=False)
+        user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+
+    db.create_all()
+
+    for user_id in range(1, 4):
+        user = User(id=user_id, name=f"user{user_id}")
+        user.addresses = [
+            Address(email_address=f"email{user_id}{i}@example.com")
+            for i in range(2)
+        ]
+        db.session.add(user)
+    db.session.commit()
+    db.session.expunge_all()
+
+    return User, Address
 
 
 class TestModelClass(DBBaseTestCase):
@@ -201,7 +240,7 @@ class TestModelClass(DBBaseTestCase):
             id = db.Column(db.Integer, primary_key=True)
             name = db.Column(db.String(30), nullable=False)
             addresses = db.relationship(
-                "Address", backref="user", lazy="immediate"
+                "Address", backref="user", lazy="selectin"
             )
 
         class Address(db.Model):
@@ -219,8 +258,7 @@ class TestModelClass(DBBaseTestCase):
         address1 = Address(email_address="email1@example.com", user_id=user.id)
         address2 = Address(email_address="email2@example.com", user_id=user.id)
 
-        db.session.add(address1)
-        db.session.add(address2)
+        db.session.add_all([address1, address2])
         db.session.commit()
 
         self.assertDictEqual(
@@ -253,6 +291,21 @@ class TestModelClass(DBBaseTestCase):
             },
         )
 
+    def test_relationships_selectin(self):
+        """Relationships load with one query rather than one per record."""
+        db = self.db
+        User, Address = create_users_with_addresses(db, lazy="selectin")
+
+        with count_statements(db.session.bind) as statements:
+            # any other loading would raise an error
+            users = User.query.options(
+                db.orm.selectinload(User.addresses), db.orm.raiseload("*")
+            ).all()
+            counts = [len(user.addresses) for user in users]
+
+        self.assertListEqual(counts, [2, 2, 2])
+        self.assertEqual(len(statements), 2)
+
     def test_relationship_funcs_no_relations(self):
         """test_relationship_funcs_no_relations"""
         db = self.db
@@ -285,7 +338,7 @@ class TestModelClass(DBBaseTestCase):
             id = db.Column(db.Integer, primary_key=True)
             name = db.Column(db.String(30), nullable=False)
             addresses = db.relationship(
-                "Address", backref="user", lazy="immediate"
+                "Address", backref="user", lazy="selectin"
             )
 
         class Address(db.Model):
@@ -303,8 +356,7 @@ class TestModelClass(DBBaseTestCase):
         address1 = Address(email_address="email1@example.com", user_id=user.id)
         address2 = Address(email_address="email2@example.com", user_id=user.id)
 
-        db.session.add(address1)
-        db.session.add(address2)
+        db.session.add_all([address1, address2])
         db.session.commit()
 
         self.assertSetEqual(
@@ -324,7 +376,7 @@ class TestModelClass(DBBaseTestCase):
                 "self-referential": False,
                 "uselist": True,
                 "join_depth": None,
-                "lazy": "immediate",
+                "lazy": "selectin",
                 "bidirectional": True,
             },
         )
@@ -349,12 +401,11 @@ class TestModelClass(DBBaseTestCase):
         node2 = Node(id=2, data="this is node2")
         node3 = Node(id=3, data="this is node3")
 
+        node1.children = [node2]
+        node2.children = [node3]
+
         db.session.add(node1)
         db.session.commit()
-        node1.children.append(node2)
-        db.session.commit()
-        node2.children.append(node3)
-        db.session.commit()
 
         self.assertSetEqual(
             set(node2.get_serial_fields()),
@@ -394,6 +445,8 @@ class TestModelClass(DBBaseTestCase):
         table1 = Table1(name="test").save()
 
         self.assertEqual(table1.id, Table1.query.get(1).id)
+        self.assertEqual(table1.id, Table1.get(1).id)
+        self.assertIsNone(Table1.get(2))
 
     def test__class(self):
         db = self.db
@@ -412,12 +465,74 @@ class TestModelClass(DBBaseTestCase):
 
         db.create_all()
 
-        table1 = Table1(name="test").save()
-        table2 = Table2(name="test").save()
+        table1 = Table1(name="test").save(commit=False)
+        table2 = Table2(name="test").save(commit=False)
+        db.session.commit()
 
         self.assertEqual("Table1", table1._class())
         self.assertEqual("Table2", table2._class())
 
+    def test__get_cache(self):
+        """test__get_cache
+
+        This test verifies that cached class information is held per class
+        and is cleared when a class variable is assigned.
+        """
+        db = self.db
+
+        class Table1(db.Model):
+            __tablename__ = "table1"
+
+            id = db.Column(db.Integer, primary_key=True)
+            name = db.Column(db.String, nullable=False)
+
+            def a_method(self):
+                return "not a column"
+
+        class Table2(db.Model):
+            __tablename__ = "table2"
+
+            id = db.Column(db.Integer, primary_key=True)
+
+        db.create_all()
+
+        # creating the cache leaves the mapper alone
+        with mock.patch.object(
+            Table1.__mapper__, "_expire_memoizations"
+        ) as expire:
+            Table1._get_cache()
+        expire.assert_not_called()
+
+        self.assertSetEqual(Table1._get_column_keys(), set(["id", "name"]))
+        self.assertSetEqual(Table2._get_column_keys(), set(["id"]))
+        self.assertListEqual(
+            [column.name for column in Table1._get_columns()], ["id", "name"]
+        )
+
+        self.assertIsNot(Table1._get_cache(), Table2._get_cache())
+        self.assertIn("column_keys", Table1._get_cache())
+
+        # assignment of a class variable clears the cache
+        Table1.SERIAL_STOPLIST = ["name"]
+        self.assertDictEqual(Table1._get_cache(), {})
+        self.assertIn("column_keys", Table2._get_cache())
+
+        # changes in place need an explicit clear
+        self.assertNotIn("id", Table1._get_serial_stop_list())
+        Table1.SERIAL_STOPLIST.append("id")
+        self.assertNotIn("id", Table1._get_serial_stop_list())
+        Table1.clear_cache()
+        self.assertIn("id", Table1._get_serial_stop_list())
+
+        # so does deleting a class variable
+        Table1.SERIAL_STOPLIST = ["name", "a_method"]
+        record = Table1(id=1, name="x")
+        self.assertDictEqual(record.to_dict(), {"id": 1})
+        del Table1.SERIAL_STOPLIST
+        self.assertDictEqual(
+            record.to_dict(), {"aMethod": "not a column", "id": 1, "name": "x"}
+        )
+
     def test__get_serial_stop_list(self):
         """Test get_serial_stop_list """
 
@@ -439,6 +554,7 @@ class TestModelClass(DBBaseTestCase):
         Table1.SERIAL_STOPLIST = ["potato"]
 
         self.assertIn("potato", Table1._get_serial_stop_list())
+        self.assertIsInstance(Table1._get_serial_stop_list(), frozenset)
 
     def test__get_relationship_none(self):
         """test__get_relationship_none"""
@@ -469,7 +585,7 @@ class TestModelClass(DBBaseTestCase):
             id = db.Column(db.Integer, primary_key=True)
             name = db.Column(db.String(30), nullable=False)
             addresses = db.relationship(
-                "Address", backref="user", lazy="immediate"
+                "Address", backref="user", lazy="selectin"
             )
 
         class Address(db.Model):
@@ -525,8 +641,9 @@ class TestModelClass(DBBaseTestCase):
             role = db.Column(db.String, nullable=False)
 
         db.create_all()
-        role = Role(role="staff").save()
-        user = User(name="Bob", role_id=role.id).save()
+        role = Role(role="staff").save(commit=False)
+        user = User(name="Bob", role_id=role.id).save(commit=False)
+        db.session.commit()
 
         self.assertDictEqual(
             user._relations_info("addresses"),
@@ -575,12 +692,18 @@ class TestModelClass(DBBaseTestCase):
 
         db.create_all()
 
-        user1 = User(name="bob").save()
-        node1 = Node(id=1, data="this is node1").save()
+        user1 = User(name="bob").save(commit=False)
+        node1 = Node(id=1, data="this is node1").save(commit=False)
+        db.session.commit()
 
         self.assertFalse(user1._has_self_ref())
         self.assertTrue(node1._has_self_ref())
 
+        # cached until a class variable is assigned
+        self.assertTrue(Node._get_cache()["has_self_ref"])
+        Node.SERIAL_FIELDS = ["id", "data"]
+        self.assertFalse(node1._has_self_ref())
+
     def test_get_serial_fields(self):
         db = self.db
 
@@ -604,6 +727,20 @@ class TestModelClass(DBBaseTestCase):
             set(["id", "parent_id", "data", "children"]),
         )
 
+        # cached in sorted order, but each call returns a new list
+        self.assertListEqual(
+            Node.get_serial_fields(), ["children", "data", "id", "parent_id"]
+        )
+        self.assertIn("serial_fields", Node._get_cache())
+        self.assertIsNot(Node.get_serial_fields(), Node.get_serial_fields())
+
+        # assigning a stop list clears the cache
+        Node.SERIAL_STOPLIST = ["data"]
+        self.assertSetEqual(
+            set(node1.get_serial_fields()),
+            set(["id", "parent_id", "children"]),
+        )
+
     def test_to_dict(self):
         db = self.db
 
@@ -634,12 +771,11 @@ class TestModelClass(DBBaseTestCase):
         node2 = Node(id=2, data="this is node2")
         node3 = Node(id=3, data="this is node3")
 
+        node1.children = [node2]
+        node2.children = [node3]
+
         db.session.add(node1)
         db.session.commit()
-        node1.children.append(node2)
-        db.session.commit()
-        node2.children.append(node3)
-        db.session.commit()
 
         # to be tested
         #   (not level_limits=None since that is really an internal process)
@@ -737,33 +873,34 @@ class TestModelClass(DBBaseTestCase):
         Node.SERIAL_FIELDS = ["id", "parent_id", "data", "children"]
 
         self.assertEqual(
-            str(OrderedDict(node1.to_dict(to_camel_case=True, sort=False))),
+            str(node1.to_dict(to_camel_case=True, sort=False)),
             str(
-                OrderedDict(
-                    {
-                        "id": 1,
-                        "parentId": None,
-                        "data": "this is node1",
-                        "children": [
-                            {
-                                "id": 2,
-                                "parentId": 1,
-                                "data": "this is node2",
-                                "children": [
-                                    {
-                                        "id": 3,
-                                        "parentId": 2,
-                                        "data": "this is node3",
-                                        "children": [],
-                                    }
-                                ],
-                            }
-                        ],
-                    }
-                )
+                {
+                    "id": 1,
+                    "parentId": None,
+                    "data": "this is node1",
+                    "children": [
+                        {
+                            "id": 2,
+                            "parentId": 1,
+                            "data": "this is node2",
+                            "children": [
+                                {
+                                    "id": 3,
+                                    "parentId": 2,
+                                    "data": "this is node3",
+                                    "children": [],
+                                }
+                            ],
+                        }
+                    ],
+                }
             ),
         )
 
+        # camel case names are kept for the class
+        self.assertEqual(Node._get_camel_keys()["parent_id"], "parentId")
+
         # test ad hoc serial list
         self.assertDictEqual(
             node1.to_dict(serial_fields=["parent_id"]), {"parentId": None},
@@ -880,11 +1017,12 @@ class TestModelClass(DBBaseTestCase):
 
         db.create_all()
 
-        table = Table(id=0).save()
-        table1 = Table1(id=1, table_id=0).save()
-        table2 = Table2(id=2, table_id=0).save()
-        table3 = Table3(id=3, table_id=0).save()
-        table4 = Table4(id=4).save()
+        table = Table(id=0).save(commit=False)
+        table1 = Table1(id=1, table_id=0).save(commit=False)
+        table2 = Table2(id=2, table_id=0).save(commit=False)
+        table3 = Table3(id=3, table_id=0).save(commit=False)
+        table4 = Table4(id=4).save(commit=False)
+        db.session.commit()
         # table 4 is skipped, so empty
 
         self.assertDictEqual(
@@ -898,6 +1036,55 @@ class TestModelClass(DBBaseTestCase):
             },
         )
 
+    def test_serial_load_options(self):
+        """test_serial_load_options"""
+        db = self.db
+        # lazy=True is the same as lazy="select"
+        User, Address = create_users_with_addresses(
+            db, order_by="Address.id", lazy=True
+        )
+
+        self.assertEqual(len(User.serial_load_options()), 1)
+        # the backref with the default lazy="select"
+        self.assertEqual(len(Address.serial_load_options()), 1)
+
+        # not selected if not serialized
+        User.SERIAL_STOPLIST = ["addresses"]
+        self.assertListEqual(User.serial_load_options(), [])
+        User.SERIAL_STOPLIST = None
+
+        with count_statements(db.session.bind) as statements:
+            users = User.query.options(*User.serial_load_options()).all()
+            result = [user.to_dict() for user in users]
+
+        # one query for users, one for all the addresses
+        self.assertEqual(len(statements), 2)
+        self.assertListEqual(
+            [len(user["addresses"]) for user in result], [2, 2, 2]
+        )
+
+    def test_serial_load_options_unconfigured(self):
+        """test_serial_load_options_unconfigured
+
+        The backref only exists once the mappers are configured.
+        """
+        db = self.db
+
+        class User(db.Model):
+            __tablename__ = "users"
+            id = db.Column(db.Integer, primary_key=True)
+            addresses = db.relationship("Address", backref="user")
+
+        class Address(db.Model):
+            __tablename__ = "addresses"
+            id = db.Column(db.Integer, primary_key=True)
+            user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+
+        # before create_all or any query configures the mappers
+        self.assertEqual(len(Address.serial_load_options()), 1)
+        self.assertFalse(Address._has_self_ref())
+        self.assertEqual(len(Address.serial_load_options()), 1)
+
     def test_serialize(self):
         """test_serialize"""
 
@@ -930,6 +1117,50 @@ class TestModelClass(DBBaseTestCase):
                 table1.to_dict(to_camel_case=False, sort=True), indent=4
             ),
         )
+        self.assertEqual(
+            table1.serialize(sort=True, indent=2),
+            json.dumps(table1.to_dict(sort=True), indent=2),
+        )
+
+    def test_serialize_query(self):
+        """test_serialize_query"""
+        db = self.db
+        User, Address = create_users_with_addresses(
+            db, order_by="Address.id"
+        )
+
+        with count_statements(db.session.bind) as statements:
+            result = json.loads(User.serialize_query(sort=True))
+
+        self.assertEqual(len(statements), 2)
+        self.assertDictEqual(
+            result[0],
+            {
+                "addresses": [
+                    {
+                        "emailAddress": "email10@example.com",
+                        "id": 1,
+                        "userId": 1,
+                    },
+                    {
+                        "emailAddress": "email11@example.com",
+                        "id": 2,
+                        "userId": 1,
+                    },
+                ],
+                "id": 1,
+                "name": "user1",
+            },
+        )
+        self.assertEqual(len(result), 3)
+
+        # a filtered query
+        result = json.loads(
+            User.serialize_query(
+                User.query.filter(User.id > 1), serial_fields=["name"]
+            )
+        )
+        self.assertListEqual(result, [{"name": "user2"}, {"name": "user3"}])
 
     def test_deserialize(self):
         """test_deserialize"""
@@ -986,6 +1217,9 @@ class TestModelClass(DBBaseTestCase):
             },
         )
 
+        # without conversion the data is passed through, not copied
+        self.assertIs(table1.deserialize(data, from_camel_case=False), data)
+
         data = json.dumps(
             [
                 {
@@ -1049,6 +1283,102 @@ class TestModelClass(DBBaseTestCase):
             ],
         )
 
+        # the cached key maps hold only the columns, not extraneous keys
+        self.assertDictEqual(
+            Table1._get_deserial_key_map(only_columns=False),
+            {"id": "id", "longName": "long_name"},
+        )
+        self.assertDictEqual(
+            Table1._get_deserial_key_map(only_columns=True),
+            {"id": "id", "longName": "long_name"},
+        )
+
+        # converted keys are interned
+        self.assertIs(
+            Table1._get_deserial_key_map(only_columns=True)["longName"],
+            sys.intern("long_name"),
+        )
+
+    def test_bulk_deserialize(self):
+        """test_bulk_deserialize"""
+        db = self.db
+
+        class Table1(db.Model):
+            __tablename__ = "table1"
+
+            id = db.Column(db.Integer, primary_key=True)
+            long_name = db.Column(db.String, nullable=False)
+
+        db.create_all()
+
+        data = json.dumps(
+            [
+                {"id": i, "longName": f"name{i}", "other": "extraneous"}
+                for i in range(1, 11)
+            ]
+        )
+
+        engine = db.session.bind
+        with count_statements(engine, "INSERT") as statements:
+            Table1.bulk_deserialize(data)
+
+        # one statement for all of the rows
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(Table1.query.count(), 10)
+        self.assertEqual(db.session.query(Table1).get(10).long_name, "name10")
+
+        # a single record without conversion
+        Table1.bulk_deserialize(
+            {"id": 11, "long_name": "name11"}, from_camel_case=False
+        )
+        self.assertEqual(Table1.query.count(), 11)
+
+        # a file in batches
+        fobj = io.StringIO(
+            json.dumps(
+                [{"id": i, "longName": f"name{i}"} for i in range(12, 1012)]
+            )
+        )
+        with count_statements(engine, "INSERT") as statements:
+            Table1.bulk_deserialize(fobj, batch_size=300)
+
+        self.assertEqual(len(statements), 4)
+        self.assertEqual(Table1.query.count(), 1011)
+
+        # a binary file read with ijson as the records are inserted
+        records = [
+            {"id": i, "longName": f"name{i}"} for i in range(1012, 1512)
+        ]
+        ijson_stub = mock.Mock()
+        ijson_stub.parse.return_value = iter([("", "start_array", None)])
+        ijson_stub.items.side_effect = lambda events, prefix: iter(records)
+        fobj = io.BytesIO(json.dumps(records).encode())
+        with mock.patch.object(self.dbbase.utils, "ijson", ijson_stub):
+            with count_statements(engine, "INSERT") as statements:
+                Table1.bulk_deserialize(fobj, batch_size=300)
+
+        ijson_stub.parse.assert_called_once_with(fobj, use_float=True)
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(Table1.query.count(), 1511)
+
+        # a file is inserted in batches even without a batch_size
+        fobj = io.BytesIO(
+            json.dumps(
+                [{"id": i, "longName": f"name{i}"} for i in range(1512, 2512)]
+            ).encode()
+        )
+        with mock.patch.object(self.dbbase.model, "FILE_BATCH_SIZE", 400):
+            with count_statements(engine, "INSERT") as statements:
+                Table1.bulk_deserialize(fobj)
+
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(Table1.query.count(), 2511)
+
+        # a file must hold an array, with or without ijson
+        fobj = io.BytesIO(json.dumps({"id": 2512, "longName": "x"}).encode())
+        self.assertRaises(ValueError, Table1.bulk_deserialize, fobj)
+        self.assertEqual(Table1.query.count(), 2511)
+
     def test_save(self):
         """test_save"""
 
@@ -1072,6 +1402,13 @@ class TestModelClass(DBBaseTestCase):
 
         self.assertEqual(table1, table_saved)
 
+        # flushed, but not committed
+        table2 = Table1(long_name="this is another long name")
+        table2.save(commit=False)
+        self.assertIsNotNone(table2.id)
+        db.session.rollback()
+        self.assertEqual(Table1.query.count(), 1)
+
     def test_delete(self):
         """test_delete"""
 
@@ -1195,6 +1532,10 @@ class TestModelClass(DBBaseTestCase):
             table2.to_dict(),
         )
 
+        self.assertTrue(Table1._is_write_only("password"))
+        self.assertFalse(Table1._is_write_only("id"))
+        self.assertFalse(Table1._is_write_only("writable"))
+
     def test_filter_columns(self):
         """ test_filter_columns
 
@@ -2,13 +2,17 @@
 """
 This module tests various aspects of serialization.
 """
+from contextlib import contextmanager
 from datetime import date, datetime
 from decimal import Decimal
+from itertools import count
 import uuid
-from random import randint
 
 from . import DBBaseTestCase
 
+# user ids are unique across the tests in the process
+next_id = count(1000000).__next__
+
 
 def init_variables(obj):
     """common variables"""
@@ -22,15 +26,39 @@ def reset_serial_variables(cls, objs):
     cls.SERIAL_STOPLIST = None
     cls.SERIAL_FIELD_RELATIONS = None
 
-    if isinstance(objs, list):
-        for obj in objs:
-            obj.SERIAL_FIELDS = cls.SERIAL_FIELDS
-            obj.SERIAL_STOPLIST = cls.SERIAL_STOPLIST
-            obj.SERIAL_FIELD_RELATIONS = cls.SERIAL_FIELD_RELATIONS
-    else:
-        objs.SERIAL_FIELDS = cls.SERIAL_FIELDS
-        objs.SERIAL_STOPLIST = cls.SERIAL_STOPLIST
-        objs.SERIAL_FIELD_RELATIONS = cls.SERIAL_FIELD_RELATIONS
+    if not isinstance(objs, (list, tuple)):
+        objs = [objs]
+    for obj in objs:
+        obj.SERIAL_FIELDS = cls.SERIAL_FIELDS
+        obj.SERIAL_STOPLIST = cls.SERIAL_STOPLIST
+        obj.SERIAL_FIELD_RELATIONS = cls.SERIAL_FIELD_RELATIONS
+
+
+@contextmanager
+def serial_vars_reset(cls, objs):
+    """Reset serial variables on entry and again on exit, even on failure"""
+    reset_serial_variables(cls, objs)
+    try:
+        yield
+    finally:
+        reset_serial_variables(cls, objs)
+
+
+# values that convert without a model, and the expected results
+BASIC_VALUES = [
+    (1, 1),
+    ("this is text", "this is text"),
+    (datetime(2020, 7, 24, 12, 31, 5), "2020-07-24 12:31:05"),
+    (date(2020, 7, 24), "2020-07-24"),
+    (True, True),
+    (None, None),
+    (123.456, 123.456),
+    (Decimal("123.456"), "123.456"),
+    (
+        uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "12345678123456781234567812345678",
+    ),
+]
 
 
 class TestSerializers(DBBaseTestCase):
@@ -45,31 +73,19 @@ class TestSerializers(DBBaseTestCase):
 
         init_variables(self)
 
-        value = 1
-        self.assertEqual(
-            _eval_value(
-                value, self.to_camel_case, self.level_limits, None, None
-            ),
-            value,
-        )
+        for value, expected in BASIC_VALUES:
+            with self.subTest(value=value):
+                result = _eval_value(
+                    value, self.to_camel_case, self.level_limits, None, None
+                )
+                self.assertEqual(result, expected)
+                self.assertIs(type(result), type(expected))
 
-        value = "this is text"
-        self.assertEqual(
-            _eval_value(
-                value, self.to_camel_case, self.level_limits, None, None
-            ),
-            value,
-        )
+        # subclasses are converted like the base type
+        class SubDatetime(datetime):
+            pass
 
-        value = "this is text"
-        self.assertEqual(
-            _eval_value(
-                value, self.to_camel_case, self.level_limits, None, None
-            ),
-            value,
-        )
-
-        value = datetime(2020, 7, 24, 12, 31, 5)
+        value = SubDatetime(2020, 7, 24, 12, 31, 5)
         self.assertEqual(
             _eval_value(
                 value, self.to_camel_case, self.level_limits, None, None
@@ -77,37 +93,24 @@ class TestSerializers(DBBaseTestCase):
             "2020-07-24 12:31:05",
         )
 
-        value = date(2020, 7, 24)
-        self.assertEqual(
-            _eval_value(
-                value, self.to_camel_case, self.level_limits, None, None
-            ),
-            "2020-07-24",
-        )
-
-        value = 123.456
-        self.assertAlmostEqual(
-            _eval_value(
-                value, self.to_camel_case, self.level_limits, None, None
-            ),
-            123.456,
-        )
+        class SubDate(date):
+            pass
 
-        value = Decimal("123.456")
-        self.assertEqual(
-            _eval_value(
-                value, self.to_camel_case, self.level_limits, None, None
-            ),
-            "123.456",
-        )
+        class SubUUID(uuid.UUID):
+            pass
 
-        value = uuid.uuid4()
-        self.assertEqual(
-            _eval_value(
-                value, self.to_camel_case, self.level_limits, None, None
+        for value, expected in [
+            (SubDate(2020, 7, 24), "2020-07-24"),
+            (
+                SubUUID("12345678-1234-5678-1234-567812345678"),
+                "12345678123456781234567812345678",
             ),
-            str(value).replace("-", ""),
-        )
+        ]:
+            with self.subTest(value=value):
+                result = _eval_value(
+                    value, self.to_camel_case, self.level_limits, None, None
+                )
+                self.assertEqual(result, expected)
 
     def test_eval_value(self):
         """Test _eval_value
@@ -124,6 +127,7 @@ class TestSerializers(DBBaseTestCase):
         In this case, the model is not self-referential.
         """
         _eval_value = self.dbbase.serializers._eval_value
+        STOP_VALUE = self.dbbase.serializers.STOP_VALUE
 
         db = self.db
 
@@ -173,16 +177,17 @@ class TestSerializers(DBBaseTestCase):
         )
 
         # model has been already processed, so level_limits has class
-        level_limits = {user._class(): 1}
+        user_class = user._class()
+        level_limits = {user_class: 1}
         self.assertEqual(
             _eval_value(
                 value,
                 to_camel_case=False,
                 level_limits=level_limits,
-                source_class=value._class(),
+                source_class=user_class,
                 serial_field_relations={},
             ),
-            self.dbbase.serializers.STOP_VALUE,
+            STOP_VALUE,
         )
 
     def test_eval_value_model_relationships(self):
@@ -201,7 +206,7 @@ class TestSerializers(DBBaseTestCase):
             id = db.Column(db.Integer, primary_key=True)
             name = db.Column(db.String(30), nullable=False)
             addresses = db.relationship(
-                "Address", backref="users", lazy="immediate"
+                "Address", backref="users", lazy="selectin"
             )
 
         class Address(db.Model):
@@ -215,12 +220,12 @@ class TestSerializers(DBBaseTestCase):
             user = db.relationship("User", back_populates="addresses")
 
         User.addresses = db.relationship(
-            "Address", back_populates="user", lazy="immediate"
+            "Address", back_populates="user", lazy="selectin"
         )
 
         db.create_all()
 
-        user = User(id=randint(1, 1000000), name="Bob")
+        user = User(id=next_id(), name="Bob")
 
         db.session.add(user)
         db.session.commit()
@@ -228,8 +233,7 @@ class TestSerializers(DBBaseTestCase):
         address1 = Address(email_address="email1@example.com", user_id=user.id)
         address2 = Address(email_address="email2@example.com", user_id=user.id)
 
-        db.session.add(address1)
-        db.session.add(address2)
+        db.session.add_all([address1, address2])
         db.session.commit()
 
         db.session.refresh(user)
@@ -300,12 +304,11 @@ class TestSerializers(DBBaseTestCase):
 
         db.create_all()
 
-        user1 = User(id=randint(1, 1000000), name="Bob")
+        user1 = User(id=next_id(), name="Bob")
 
-        user2 = User(id=randint(1, 1000000), name="JimBob")
+        user2 = User(id=next_id(), name="JimBob")
 
-        db.session.add(user1)
-        db.session.add(user2)
+        db.session.add_all([user1, user2])
         db.session.commit()
 
         db.session.refresh(user1)
@@ -313,36 +316,34 @@ class TestSerializers(DBBaseTestCase):
 
         value = ["something", "trivial"]
         level_limits = {}
-        self.assertTupleEqual(
-            _eval_value_list(
-                value,
-                to_camel_case=True,
-                level_limits={},
-                source_class=None,
-                serial_field_relations={},
-            ),
-            (["something", "trivial"], level_limits),
+        result, limits = _eval_value_list(
+            value,
+            to_camel_case=True,
+            level_limits={},
+            source_class=None,
+            serial_field_relations={},
         )
+        self.assertEqual(result, ["something", "trivial"])
+        self.assertDictEqual(limits, level_limits)
 
         value = [user1, user2]
         level_limits = {}
 
-        self.assertTupleEqual(
-            _eval_value_list(
-                value,
-                to_camel_case=True,
-                level_limits={},
-                source_class=None,
-                serial_field_relations={},
-            ),
-            (
-                [
-                    {"id": user1.id, "name": "Bob"},
-                    {"id": user2.id, "name": "JimBob"},
-                ],
-                {user1._class(): 2},
-            ),
+        result, limits = _eval_value_list(
+            value,
+            to_camel_case=True,
+            level_limits={},
+            source_class=None,
+            serial_field_relations={},
         )
+        self.assertEqual(
+            result,
+            [
+                {"id": user1.id, "name": "Bob"},
+                {"id": user2.id, "name": "JimBob"},
+            ],
+        )
+        self.assertDictEqual(limits, {user1._class(): 2})
 
     def test_eval_value_model(self):
         """Test test_eval_value_model
@@ -364,7 +365,7 @@ class TestSerializers(DBBaseTestCase):
             id = db.Column(db.Integer, primary_key=True)
             name = db.Column(db.String(30), nullable=False)
             addresses = db.relationship(
-                "Address", backref="user", lazy="immediate"
+                "Address", backref="user", lazy="selectin"
             )
 
         class Address(db.Model):
@@ -377,7 +378,7 @@ class TestSerializers(DBBaseTestCase):
 
         db.create_all()
 
-        user = User(id=randint(1, 1000000), name="Bob")
+        user = User(id=next_id(), name="Bob")
 
         db.session.add(user)
         db.session.commit()
@@ -385,10 +386,12 @@ class TestSerializers(DBBaseTestCase):
         address1 = Address(email_address="email1@example.com", user_id=user.id)
         address2 = Address(email_address="email2@example.com", user_id=user.id)
 
-        db.session.add(address1)
-        db.session.add(address2)
+        db.session.add_all([address1, address2])
         db.session.commit()
 
+        user_class = user._class()
+        address_class = address1._class()
+
         # Combine user and addresses
         # while user is an object of address, it is automatically
         # excluded in addresses due to level_limits to prevent runaway
@@ -396,196 +399,190 @@ class TestSerializers(DBBaseTestCase):
         # is that it stems from another model to start.
         value = user
         level_limits = {}
-        self.assertTupleEqual(
-            _eval_value_model(
-                value,
-                to_camel_case=True,
-                level_limits=level_limits,
-                source_class=None,
-                serial_field_relations={},
-            ),
-            (
-                {
-                    "id": user.id,
-                    "name": "Bob",
-                    "addresses": [
-                        {
-                            "id": 1,
-                            "emailAddress": "email1@example.com",
-                            "userId": user.id,
-                        },
-                        {
-                            "id": 2,
-                            "emailAddress": "email2@example.com",
-                            "userId": user.id,
-                        },
-                    ],
-                },
-                {user._class(): 2},
-            ),
+        result, limits = _eval_value_model(
+            value,
+            to_camel_case=True,
+            level_limits=level_limits,
+            source_class=None,
+            serial_field_relations={},
         )
+        self.assertEqual(
+            result,
+            {
+                "id": user.id,
+                "name": "Bob",
+                "addresses": [
+                    {
+                        "id": 1,
+                        "emailAddress": "email1@example.com",
+                        "userId": user.id,
+                    },
+                    {
+                        "id": 2,
+                        "emailAddress": "email2@example.com",
+                        "userId": user.id,
+                    },
+                ],
+            },
+        )
+        self.assertDictEqual(limits, {user_class: 2})
 
         # starting with address
         # should find and include the user data as well
         value = address1
         level_limits = {}
-        self.assertTupleEqual(
-            _eval_value_model(
-                value,
-                to_camel_case=True,
-                level_limits=level_limits,
-                source_class=None,
-                serial_field_relations={},
-            ),
-            (
-                {
-                    "id": 1,
-                    "emailAddress": "email1@example.com",
-                    "userId": user.id,
-                    "user": {"id": user.id, "name": "Bob"},
-                },
-                {address1._class(): 2, user._class(): 2},
-            ),
+        result, limits = _eval_value_model(
+            value,
+            to_camel_case=True,
+            level_limits=level_limits,
+            source_class=None,
+            serial_field_relations={},
         )
+        self.assertEqual(
+            result,
+            {
+                "id": 1,
+                "emailAddress": "email1@example.com",
+                "userId": user.id,
+                "user": {"id": user.id, "name": "Bob"},
+            },
+        )
+        self.assertDictEqual(limits, {address_class: 2, user_class: 2})
 
         # test modifications via serial stop lists
         # do it wrong first
-        Address.SERIAL_STOPLIST = "user_id"
-        self.assertRaises(ValueError, address1._get_serial_stop_list)
+        with serial_vars_reset(Address, [address1, address2]):
+            Address.SERIAL_STOPLIST = "user_id"
+            self.assertRaises(ValueError, address1._get_serial_stop_list)
 
         # now remove user_id from via the stop list
-        reset_serial_variables(Address, [address1, address2])
-        Address.SERIAL_STOPLIST = ["user_id"]
-        self.assertSetEqual(
-            set(address1.get_serial_fields()),
-            set(["id", "email_address", "user"]),
-        )
+        with serial_vars_reset(Address, [address1, address2]):
+            Address.SERIAL_STOPLIST = ["user_id"]
+            self.assertSetEqual(
+                set(address1.get_serial_fields()),
+                set(["id", "email_address", "user"]),
+            )
 
         # now add email_address to the include list
         # do it wrong first
-        reset_serial_variables(Address, [address1, address2])
-        Address.SERIAL_FIELDS = "email_address"
-        self.assertRaises(ValueError, address1.get_serial_fields)
+        with serial_vars_reset(Address, [address1, address2]):
+            Address.SERIAL_FIELDS = "email_address"
+            self.assertRaises(ValueError, address1.get_serial_fields)
 
         # now add email_address to the include list
-        reset_serial_variables(Address, [address1, address2])
-
-        # see how this is NOT changed at the instance level
-        address1.SERIAL_FIELDS = ["email_address"]
-        address2.SERIAL_FIELDS = ["email_address"]
-        class_serial_fields = Address.get_serial_fields()
-        self.assertListEqual(address1.get_serial_fields(), class_serial_fields)
-
-        # prove it works with _eval_value_model
-        value = address1
-        level_limits = {}
-        self.assertTupleEqual(
-            _eval_value_model(
-                value,
-                to_camel_case=True,
-                level_limits=level_limits,
-                source_class=None,
-                serial_field_relations={},
-            ),
-            ({"emailAddress": "email1@example.com"}, {address1._class(): 2},),
-        )
+        with serial_vars_reset(Address, [address1, address2]):
+
+            # see how this is NOT changed at the instance level
+            address1.SERIAL_FIELDS = ["email_address"]
+            address2.SERIAL_FIELDS = ["email_address"]
+            class_serial_fields = Address.get_serial_fields()
+            self.assertListEqual(
+                address1.get_serial_fields(), class_serial_fields
+            )
 
-        # Combine user and addresses
-        value = user
-        level_limits = {}
-        reset_serial_variables(User, user)
-        self.assertTupleEqual(
-            _eval_value_model(
+            # prove it works with _eval_value_model
+            value = address1
+            level_limits = {}
+            result, limits = _eval_value_model(
                 value,
                 to_camel_case=True,
                 level_limits=level_limits,
                 source_class=None,
                 serial_field_relations={},
-            ),
-            (
-                {
-                    "id": user.id,
-                    "name": "Bob",
-                    "addresses": [
-                        {"emailAddress": "email1@example.com"},
-                        {"emailAddress": "email2@example.com"},
-                    ],
-                },
+            )
+            self.assertEqual(result, {"emailAddress": "email1@example.com"})
+            self.assertDictEqual(limits, {address_class: 2})
+
+            # Combine user and addresses
+            value = user
+            level_limits = {}
+            with serial_vars_reset(User, user):
+                result, limits = _eval_value_model(
+                    value,
+                    to_camel_case=True,
+                    level_limits=level_limits,
+                    source_class=None,
+                    serial_field_relations={},
+                )
+                self.assertEqual(
+                    result,
+                    {
+                        "id": user.id,
+                        "name": "Bob",
+                        "addresses": [
+                            {"emailAddress": "email1@example.com"},
+                            {"emailAddress": "email2@example.com"},
+                        ],
+                    },
+                )
                 # set([user._class(), address1._class()])
-                # NOTE: not quite sure if address should be included here
-                #       it certainly processed an address enough to get the
-                #       address.
-                {user._class(): 2},
-            ),
-        )
+                # NOTE: not quite sure if address should be included
+                #       here it certainly processed an address enough
+                #       to get the address.
+                self.assertDictEqual(limits, {user_class: 2})
 
         # Combine user and addresses
-        # release SERIAL_FIELDS restrictions
-        # SERIAL_STOPLIST
-        reset_serial_variables(Address, [address1, address2])
-
+        # SERIAL_FIELDS restrictions were released on leaving the block
         value = user
         level_limits = {}
-        self.assertTupleEqual(
-            _eval_value_model(
-                value,
-                to_camel_case=True,
-                level_limits=level_limits,
-                source_class=None,
-                serial_field_relations={},
-            ),
-            (
-                {
-                    "id": user.id,
-                    "name": "Bob",
-                    "addresses": [
-                        {
-                            "id": 1,
-                            "emailAddress": "email1@example.com",
-                            "userId": user.id,
-                        },
-                        {
-                            "id": 2,
-                            "emailAddress": "email2@example.com",
-                            "userId": user.id,
-                        },
-                    ],
-                },
-                # same note as above
-                # NOTE: not quite sure if address should be included here
-                #       it certainly processed an address enough to get the
-                #       address.
-                {user._class(): 2},
-            ),
+        result, limits = _eval_value_model(
+            value,
+            to_camel_case=True,
+            level_limits=level_limits,
+            source_class=None,
+            serial_field_relations={},
+        )
+        self.assertEqual(
+            result,
+            {
+                "id": user.id,
+                "name": "Bob",
+                "addresses": [
+                    {
+                        "id": 1,
+                        "emailAddress": "email1@example.com",
+                        "userId": user.id,
+                    },
+                    {
+                        "id": 2,
+                        "emailAddress": "email2@example.com",
+                        "userId": user.id,
+                    },
+                ],
+            },
         )
+        # same note as above
+        # NOTE: not quite sure if address should be included here
+        #       it certainly processed an address enough to get the
+        #       address.
+        self.assertDictEqual(limits, {user_class: 2})
 
         # modify address via serial_field_relations
         level_limits = {}
         value = user
-        self.assertTupleEqual(
-            _eval_value_model(
-                value,
-                to_camel_case=True,
-                level_limits=level_limits,
-                source_class=None,
-                serial_field_relations={"Address": ["email_address"]},
-            ),
-            (
-                {
-                    "id": user.id,
-                    "name": "Bob",
-                    "addresses": [
-                        {"emailAddress": "email1@example.com"},
-                        {"emailAddress": "email2@example.com"},
-                    ],
-                },
-                # same note as above
-                # NOTE: not quite sure if address should be included here
-                #       it certainly processed an address enough to get the
-                #       address.
-                {user._class(): 2},
-            ),
+        result, limits = _eval_value_model(
+            value,
+            to_camel_case=True,
+            level_limits=level_limits,
+            source_class=None,
+            serial_field_relations={"Address": ["email_address"]},
+        )
+        self.assertEqual(
+            result,
+            {
+                "id": user.id,
+                "name": "Bob",
+                "addresses": [
+                    {"emailAddress": "email1@example.com"},
+                    {"emailAddress": "email2@example.com"},
+                ],
+            },
         )
+        # same note as above
+        # NOTE: not quite sure if address should be included here
+        #       it certainly processed an address enough to get the
+        #       address.
+        self.assertDictEqual(limits, {user_class: 2})
 
         # check the aftermath
         self.assertIsNone(Address.SERIAL_FIELDS)
@@ -625,74 +622,63 @@ class TestSerializers(DBBaseTestCase):
         db.create_all()
 
         node1 = Node(id=1, data="this is node1")
-        node2 = Node(id=2, data="this is node2")
-        node3 = Node(id=3, data="this is node3")
-        node4 = Node(id=4, data="this is node4")
-        node5 = Node(id=5, data="this is node5")
-        node6 = Node(id=6, data="this is node6")
+        node2 = Node(id=2, parent_id=1, data="this is node2")
+        node3 = Node(id=3, parent_id=2, data="this is node3")
+        node4 = Node(id=4, parent_id=2, data="this is node4")
+        node5 = Node(id=5, parent_id=1, data="this is node5")
+        node6 = Node(id=6, parent_id=5, data="this is node6")
 
-        db.session.add(node1)
-        db.session.commit()
-        node1.children.append(node2)
-        db.session.commit()
-        node2.children.append(node3)
-        db.session.commit()
-        node2.children.append(node4)
-        db.session.commit()
-        node1.children.append(node5)
-        db.session.commit()
-        node5.children.append(node6)
+        db.session.add_all([node1, node2, node3, node4, node5, node6])
         db.session.commit()
 
         value = node1
-        self.assertTupleEqual(
-            _eval_value_model(
-                value,
-                to_camel_case=True,
-                level_limits={},
-                source_class=None,
-                serial_field_relations={},
-            ),
-            (
-                {
-                    "children": [
-                        {
-                            "children": [
-                                {
-                                    "children": [],
-                                    "id": 3,
-                                    "data": "this is node3",
-                                    "parentId": 2,
-                                },
-                                {
-                                    "children": [],
-                                    "id": 4,
-                                    "data": "this is node4",
-                                    "parentId": 2,
-                                },
-                            ],
-                            "id": 2,
-                            "data": "this is node2",
-                            "parentId": 1,
-                        },
-                        {
-                            "children": [
-                                {
-                                    "children": [],
-                                    "id": 6,
-                                    "data": "this is node6",
-                                    "parentId": 5,
-                                }
-                            ],
-                            "id": 5,
-                            "data": "this is node5",
-                            "parentId": 1,
-                        },
-                    ],
-                    "id": 1,
-                    "data": "this is node1",
-                    "parentId": None,
-                },
-                {node1._class(): 2},
-            ),
+        result, limits = _eval_value_model(
+            value,
+            to_camel_case=True,
+            level_limits={},
+            source_class=None,
+            serial_field_relations={},
+        )
+        self.assertEqual(
+            result,
+            {
+                "children": [
+                    {
+                        "children": [
+                            {
+                                "children": [],
+                                "id": 3,
+                                "data": "this is node3",
+                                "parentId": 2,
+                            },
+                            {
+                                "children": [],
+                                "id": 4,
+                                "data": "this is node4",
+                                "parentId": 2,
+                            },
+                        ],
+                        "id": 2,
+                        "data": "this is node2",
+                        "parentId": 1,
+                    },
+                    {
+                        "children": [
+                            {
+                                "children": [],
+                                "id": 6,
+                                "data": "this is node6",
+                                "parentId": 5,
+                            }
+                        ],
+                        "id": 5,
+                        "data": "this is node5",
+                        "parentId": 1,
+                    },
+                ],
+                "id": 1,
+                "data": "this is node1",
+                "parentId": None,
+            },
         )
+        self.assertDictEqual(limits, {node1._class(): 2})
@@ -1,7 +1,23 @@
 # tests/test_dbbase/utils.py
 """This module tests utility functions."""
 from datetime import date, datetime
+import io
 import json
+import math
+import string
+import sys
+import unittest
+from unittest import mock
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 from . import BaseTestCase
 
@@ -14,58 +30,208 @@ class TestUtilities(BaseTestCase):
 
         db_config(base, config_vars=None)
         """
-        # no config_vars
-        base = "test"
-        self.assertEqual(self.dbbase.utils.db_config(base), base)
-
-        # with config_vars
-        base = "sqlite:///{db_file}.db"
-        config_vars = {"db_file": "testdb"}
-        self.assertEqual(
-            self.dbbase.utils.db_config(base, config_vars),
-            "sqlite:///testdb.db",
+        db_config = self.dbbase.utils.db_config
+        sqlite_base = "sqlite:///{db_file}.db"
+
+        # base, config_vars, expected
+        cases = [
+            # no config_vars
+            ("test", None, "test"),
+            # with config_vars
+            (sqlite_base, {"db_file": "testdb"}, "sqlite:///testdb.db"),
+            # with config_vars that are not to included in the uri
+            (
+                sqlite_base,
+                {"db_file": "testdb", "superuser": "unnecessary"},
+                "sqlite:///testdb.db",
+            ),
+            # if config_vars that are in the form of JSON taken directly
+            #   from environment variables
+            (
+                sqlite_base,
+                json.dumps({"db_file": "testdb", "superuser": "unnecessary"}),
+                "sqlite:///testdb.db",
+            ),
+        ]
+        for base, config_vars, expected in cases:
+            with self.subTest(config_vars=config_vars):
+                if config_vars is None:
+                    self.assertEqual(db_config(base), expected)
+                else:
+                    self.assertEqual(db_config(base, config_vars), expected)
+
+        # config_vars as a string that is not JSON
+        self.assertRaises(
+            json.decoder.JSONDecodeError,
+            db_config,
+            sqlite_base,
+            "this is a test",
         )
 
-        # with config_vars that are not to included in the uri
-        base = "sqlite:///{db_file}.db"
-        config_vars = {"db_file": "testdb", "superuser": "unnecessary"}
-        self.assertEqual(
-            self.dbbase.utils.db_config(base, config_vars),
-            "sqlite:///testdb.db",
-        )
+    def test__json_loads(self):
+        """Test JSON conversion with or without orjson."""
+        _json_loads = self.dbbase.utils._json_loads
+
+        data = {"id": 1, "longName": "this is a long name", "value": 1.5}
 
-        # if config_vars that are in the form of JSON taken directly
-        #   from environment variables
-        base = "sqlite:///{db_file}.db"
-        config_vars = json.dumps(
-            {"db_file": "testdb", "superuser": "unnecessary"}
+        self.assertDictEqual(_json_loads(json.dumps(data)), data)
+        self.assertDictEqual(_json_loads(json.dumps(data).encode()), data)
+
+        # accepted by json but not orjson
+        self.assertTrue(math.isnan(_json_loads("NaN")))
+
+        # integers too large for orjson are kept exact
+        data = {"id": 2 ** 64 + 1, "name": "large"}
+        self.assertDictEqual(_json_loads(json.dumps(data)), data)
+        self.assertDictEqual(_json_loads(json.dumps(data).encode()), data)
+        self.assertIsInstance(_json_loads(json.dumps(data))["id"], int)
+
+        self.assertRaises(
+            json.decoder.JSONDecodeError, _json_loads, "this is a test"
         )
+
+    def test__json_dumps(self):
+        """Test JSON output, by default with the json module."""
+        _json_dumps = self.dbbase.utils._json_dumps
+
+        data = {"id": 1, "longName": "this is a long name", "value": 1.5}
+
+        self.assertEqual(_json_dumps(data), json.dumps(data))
         self.assertEqual(
-            self.dbbase.utils.db_config(base, config_vars),
-            "sqlite:///testdb.db",
+            _json_dumps(data, indent=2), json.dumps(data, indent=2)
         )
+        self.assertEqual(_json_dumps({"value": math.nan}), '{"value": NaN}')
+
+        self.assertRaises(TypeError, _json_dumps, {"id": object()})
+
+    @unittest.skipUnless(orjson, "orjson is not installed")
+    def test__json_dumps_orjson(self):
+        """Test JSON output with orjson when it is asked for."""
+        utils = self.dbbase.utils
+        _json_dumps = utils._json_dumps
+
+        data = {"id": 1, "longName": "this is a long name", "value": 1.5}
+
+        with mock.patch.object(utils, "ORJSON_SERIALIZE", True):
+            # compact
+            self.assertEqual(
+                _json_dumps(data),
+                '{"id":1,"longName":"this is a long name","value":1.5}',
+            )
+            self.assertDictEqual(json.loads(_json_dumps(data, indent=2)), data)
+            self.assertEqual(
+                _json_dumps(data, indent=4), json.dumps(data, indent=4)
+            )
+
+            # NaN is written as null
+            self.assertEqual(
+                _json_dumps({"value": math.nan}), '{"value":null}'
+            )
+
+            # rejected by orjson but not json
+            self.assertDictEqual(
+                json.loads(_json_dumps({"id": 2 ** 70})), {"id": 2 ** 70}
+            )
+
+            self.assertRaises(TypeError, _json_dumps, {"id": object()})
+
+    def test__json_items(self):
+        """Test reading the items of a JSON array from a file."""
+        utils = self.dbbase.utils
+        _json_items = utils._json_items
+
+        data = [{"id": 1, "value": 1.5}, {"id": 2, "value": None}]
 
-        # if config_vars that are in the form of JSON taken directly
-        #   from environment variables
-        base = "sqlite:///{db_file}.db"
-        config_vars = "this is a test"
+        # without ijson
+        with mock.patch.object(utils, "ijson", None):
+            self.assertListEqual(
+                list(_json_items(io.StringIO(json.dumps(data)))), data
+            )
+            self.assertListEqual(
+                list(_json_items(io.BytesIO(json.dumps(data).encode()))),
+                data,
+            )
+            self.assertRaises(
+                ValueError, _json_items, io.StringIO(json.dumps(data[0]))
+            )
+
+        # with ijson, the events are checked and passed to ijson.items
+        ijson_stub = mock.Mock()
+        ijson_stub.parse.return_value = iter([("", "start_array", None)])
+        ijson_stub.items.side_effect = lambda events, prefix: iter(data)
+        fobj = io.BytesIO(json.dumps(data).encode())
+        with mock.patch.object(utils, "ijson", ijson_stub):
+            self.assertListEqual(list(_json_items(fobj)), data)
+        ijson_stub.parse.assert_called_once_with(fobj, use_float=True)
+
+        ijson_stub.parse.return_value = iter([("", "start_map", None)])
+        with mock.patch.object(utils, "ijson", ijson_stub):
+            self.assertRaises(ValueError, _json_items, fobj)
+
+    @unittest.skipUnless(ijson, "ijson is not installed")
+    def test__json_items_ijson(self):
+        """Test reading the items of a JSON array with ijson."""
+        _json_items = self.dbbase.utils._json_items
+
+        data = [{"id": 1, "value": 1.5}, {"id": 2, "value": None}]
+
+        items = _json_items(io.BytesIO(json.dumps(data).encode()))
+        self.assertNotIsInstance(items, list)
+        self.assertListEqual(list(items), data)
+
+        # the same as without ijson
+        self.assertListEqual(list(_json_items(io.BytesIO(b"[]"))), [])
         self.assertRaises(
-            json.decoder.JSONDecodeError,
-            self.dbbase.utils.db_config,
-            base,
-            config_vars,
+            ValueError, _json_items, io.BytesIO(json.dumps(data[0]).encode())
+        )
+
+    def test__batches(self):
+        """Test splitting items into batches."""
+        _batches = self.dbbase.utils._batches
+
+        self.assertListEqual(
+            list(_batches(range(5), 2)), [[0, 1], [2, 3], [4]]
         )
+        self.assertListEqual(list(_batches(range(5))), [[0, 1, 2, 3, 4]])
+
+        # a list is passed on as is
+        items = [0, 1, 2]
+        self.assertIs(next(_batches(items)), items)
+
+        self.assertListEqual(list(_batches([])), [])
+        self.assertListEqual(list(_batches([], 2)), [])
+
+        self.assertRaises(ValueError, list, _batches(range(5), 0))
 
     def test__is_sqlite(self):
         """Test whether the config is for sqlite."""
+        _is_sqlite = self.dbbase.utils._is_sqlite
+
         config = "sqlite:///{test_db}.db"
-        self.assertTrue(self.dbbase.utils._is_sqlite(config))
+        self.assertTrue(_is_sqlite(config))
 
         config = "sqlite///:memory:"
-        self.assertTrue(self.dbbase.utils._is_sqlite(config))
+        self.assertTrue(_is_sqlite(config))
 
         config = "postgresql://blah, blah"
-        self.assertFalse(self.dbbase.utils._is_sqlite(config))
+        self.assertFalse(_is_sqlite(config))
+
+        # only the start of the config counts
+        config = "postgresql://user@localhost/sqlite_tests"
+        self.assertFalse(_is_sqlite(config))
+
+    def test__is_psycopg2(self):
+        """Test whether the config is for PostgreSQL with psycopg2."""
+        _is_psycopg2 = self.dbbase.utils._is_psycopg2
+
+        self.assertTrue(_is_psycopg2("postgresql://user@localhost/testdb"))
+        self.assertTrue(
+            _is_psycopg2("postgresql+psycopg2://user@localhost/testdb")
+        )
+        self.assertFalse(
+            _is_psycopg2("postgresql+pg8000://user@localhost/testdb")
+        )
+        self.assertFalse(_is_psycopg2("sqlite:///testdb.db"))
 
     def test_xlate(self):
         """Test conversion of format for key names."""
@@ -86,6 +252,13 @@ class TestUtilities(BaseTestCase):
             xlate(key, camel_case=False), "this_is_a_lot_of_capitals"
         )
 
+        # memoized
+        utils = self.dbbase.utils
+        self.assertEqual(utils._CAMEL_CACHE["start_date"], "startDate")
+        self.assertEqual(utils._SNAKE_CACHE["startDate"], "start_date")
+        self.assertEqual(xlate("start_date"), "startDate")
+        self.assertIs(xlate("start_date"), sys.intern("startDate"))
+
     def test_xlate_camel_case(self):
         """Test conversion for js formatting."""
         _xlate_camel_case = self.dbbase.utils._xlate_camel_case
@@ -93,6 +266,12 @@ class TestUtilities(BaseTestCase):
         key = "start_date"
         self.assertEqual(_xlate_camel_case(key), "startDate")
 
+        # matches the capwords conversion
+        for key in ["start__date", "_start_date", "START_DATE", "start_d"]:
+            expected = string.capwords(key.replace("_", " ")).replace(" ", "")
+            expected = expected[0].lower() + expected[1:]
+            self.assertEqual(_xlate_camel_case(key), expected)
+
     def test_xlate_from_camel_case(self):
         """Test conversion from js formatting to python."""
         _xlate_from_camel_case = self.dbbase.utils._xlate_from_camel_case
@@ -150,3 +329,12 @@ class TestUtilities(BaseTestCase):
 
         self.assertEqual(defaults["another_id"], 100)
         self.assertIsInstance(defaults["created_at1"], datetime)
+
+        # the columns are cached, but functions are run each time
+        self.assertIn("model_defaults", TestDefaults._get_cache())
+        defaults2 = get_model_defaults(TestDefaults)
+        self.assertEqual(defaults2["name"], "string default")
+        self.assertIsNot(defaults2, defaults)
+        self.assertGreaterEqual(
+            defaults2["created_at1"], defaults["created_at1"]
+        )